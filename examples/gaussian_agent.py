@@ -23,11 +23,14 @@ class GaussianAgent(BaseAgent):
         ]
 
     async def shoot(self, board: np.ndarray) -> Tuple[int, int]:
-
-        return (
-            max(min(int(random.gauss(4.5, 2)), 9), 0),
-            max(min(int(random.gauss(4.5, 2)), 9), 0),
-        )
+        # redraw until the shot lands on a cell which has not been shot at yet
+        while True:
+            shot = (
+                max(min(int(random.gauss(4.5, 2)), 9), 0),
+                max(min(int(random.gauss(4.5, 2)), 9), 0),
+            )
+            if shot in self.legal_shots:
+                return shot
 
     async def handle_outcome(self, shot: Tuple[int, int], outcome: ShotOutcome) -> None:
         pass
@@ -23,7 +23,7 @@ class RandomAgent(BaseAgent):
         ]
 
     async def shoot(self, board: np.ndarray) -> Tuple[int, int]:
-        return (random.randint(0, 9), random.randint(0, 9))
+        return self.legal_shots.sample()
 
     async def handle_outcome(self, shot: Tuple[int, int], outcome: ShotOutcome) -> None:
         pass
@@ -14,7 +14,7 @@ class RandomShipAgent(BaseAgent):
         return generate_ships(SETTINGS["ALLOWED_SHIPS"], SETTINGS["BOARD_DIMS"])
 
     async def shoot(self, board: np.ndarray) -> Tuple[int, int]:
-        return (random.randint(0, 9), random.randint(0, 9))
+        return self.legal_shots.sample()
 
     async def handle_outcome(self, shot: Tuple[int, int], outcome: ShotOutcome) -> None:
         pass
@@ -2,7 +2,16 @@ import asyncio
 from typing import List, Set, Tuple
 
 import numpy as np
-from battleships.engine import SETTINGS, BaseAgent, Board, CellState, Ship, ShotOutcome
+from battleships.engine import (
+    SETTINGS,
+    BaseAgent,
+    Board,
+    CellState,
+    LegalShots,
+    Ship,
+    ShotOutcome,
+    track_destroyed_ship,
+)
 
 
 class GameRunner:
@@ -15,6 +24,14 @@ class GameRunner:
 
         _, y, x = message.split(" ")
         self.board = np.zeros((int(y), int(x)))
+        self.legal_shots = LegalShots((int(y), int(x)))
+        self.agent.legal_shots = self.legal_shots
+
+        # derived knowledge about the opponent's board, updated with every shot
+        self.inferred_empty = np.zeros((int(y), int(x)), dtype=bool)
+        self.remaining_ships = dict(SETTINGS["ALLOWED_SHIPS"])
+        self.agent.inferred_empty = self.inferred_empty
+        self.agent.remaining_ships = self.remaining_ships
 
         print("OK")
 
@@ -44,17 +61,27 @@ class GameRunner:
             # handling state updates
             elif message[0] == "U":
                 shot_y, shot_x, outcome = message[1:4]
-                await self.agent.handle_outcome(
-                    (int(shot_y), int(shot_x)), ShotOutcome(int(outcome))
-                )
 
+                # the agent sees the state after the shot when handling its outcome
                 if len(message) > 4:
                     cell_state, *changes = message[4:]
 
                     cell_state = int(cell_state)
+                    cells = []
                     for change in changes:
                         y, x = change.split(",")
                         self.board[int(y), int(x)] = cell_state
+                        self.legal_shots.remove((int(y), int(x)))
+                        cells.append((int(y), int(x)))
+
+                    if cell_state == CellState.DESTROYED:
+                        track_destroyed_ship(
+                            cells, self.inferred_empty, self.remaining_ships
+                        )
+
+                await self.agent.handle_outcome(
+                    (int(shot_y), int(shot_x)), ShotOutcome(int(outcome))
+                )
 
             # unknown messages
             else:
@@ -0,0 +1,171 @@
+import asyncio
+import random
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from battleships.engine import (
+    SETTINGS,
+    BaseAgent,
+    Board,
+    LegalShots,
+    Ship,
+    ShotOutcome,
+    track_destroyed_ship,
+)
+from battleships.random_ship_generator import generate_ships
+
+AgentFactory = Callable[[], BaseAgent]
+
+
+class FleetCorpus:
+    """A fixed, reproducible set of fleets to benchmark shooting policies on.
+
+    Fleets are stored as a single uint8 array of boards, in which every cell holds
+    the number of the ship occupying it (starting from 1) or 0 if it is empty.
+
+    Attributes:
+        fleets (np.ndarray): Array of shape (number of fleets, *board dims).
+        seed (Optional[int]): Seed the fleets were generated with.
+    """
+
+    fleets: np.ndarray
+    seed: Optional[int]
+
+    def __init__(self, fleets: np.ndarray, seed: Optional[int] = None) -> None:
+        self.fleets = fleets
+        self.seed = seed
+
+    @classmethod
+    def generate(
+        cls,
+        size: int,
+        seed: int,
+        ship_specs: Optional[Dict[int, int]] = None,
+        board_dims: Optional[Tuple[int, int]] = None,
+    ) -> "FleetCorpus":
+        """Generates fleets with generate_ships.
+
+        Args:
+            size (int): Number of fleets.
+            seed (int): Seed making the corpus reproducible.
+            ship_specs (Optional[Dict[int, int]]): Ships to generate, SETTINGS by default.
+            board_dims (Optional[Tuple[int, int]]): Board size, SETTINGS by default.
+        """
+        ship_specs = ship_specs or SETTINGS["ALLOWED_SHIPS"]
+        board_dims = board_dims or SETTINGS["BOARD_DIMS"]
+        fleets = np.zeros((size, *board_dims), dtype=np.uint8)
+
+        # generate_ships draws from the global random state, which is restored afterwards
+        state = random.getstate()
+        random.seed(seed)
+        try:
+            for fleet in fleets:
+                for number, ship in enumerate(generate_ships(ship_specs, board_dims)):
+                    for cell in ship:
+                        fleet[cell] = number + 1
+        finally:
+            random.setstate(state)
+
+        return cls(fleets, seed)
+
+    def save(self, path: str) -> None:
+        """Writes the corpus to a compressed .npz file."""
+        np.savez_compressed(
+            path, fleets=self.fleets, seed=-1 if self.seed is None else self.seed
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "FleetCorpus":
+        with np.load(path) as data:
+            seed = int(data["seed"])
+            return cls(data["fleets"], None if seed < 0 else seed)
+
+    def __len__(self) -> int:
+        return len(self.fleets)
+
+    def __getitem__(self, index: int) -> List[Set[Tuple[int, int]]]:
+        """Returns a fleet in the format of BaseAgent.get_ships()."""
+        fleet = self.fleets[index]
+        return [
+            {(int(y), int(x)) for y, x in zip(*np.nonzero(fleet == number))}
+            for number in range(1, int(fleet.max()) + 1)
+        ]
+
+
+async def shots_to_clear(
+    agent: BaseAgent,
+    ships: List[Set[Tuple[int, int]]],
+    board_dims: Tuple[int, int],
+    max_shots: int,
+) -> int:
+    """Counts the shots an agent needs to destroy a fleet, without an opponent.
+
+    Args:
+        agent (BaseAgent): Agent making the shots.
+        ships (List[Set[Tuple[int, int]]]): Fleet to destroy.
+        board_dims (Tuple[int, int]): Size of the board.
+        max_shots (int): Number of shots after which the agent is stopped.
+
+    Returns:
+        Number of shots taken, max_shots if the fleet was not destroyed.
+    """
+    board = Board(board_dims)
+    board.register_ships([Ship(ship) for ship in ships])
+    # a copy of the board's legal shots, which the agent may modify freely
+    agent.legal_shots = LegalShots(board_dims)
+    agent.inferred_empty = np.zeros(board_dims, dtype=bool)
+    agent.remaining_ships = {}
+    for ship in ships:
+        agent.remaining_ships[len(ship)] = agent.remaining_ships.get(len(ship), 0) + 1
+    remaining = len(ships)
+
+    for shots in range(1, max_shots + 1):
+        shot = await agent.shoot(board.get_masked_board())
+        outcome, _, changes = board.shoot(shot)
+        for cell in changes:
+            agent.legal_shots.remove(cell)
+        if outcome == ShotOutcome.DESTROYED:
+            track_destroyed_ship(changes, agent.inferred_empty, agent.remaining_ships)
+            remaining -= 1
+
+        await agent.handle_outcome(shot, outcome)
+
+        if not remaining:
+            return shots
+
+    return max_shots
+
+
+async def evaluate(
+    agent: AgentFactory,
+    corpus: FleetCorpus,
+    concurrency: int = 64,
+    max_shots: int = 1000,
+) -> np.ndarray:
+    """Measures how many shots a policy needs to destroy every fleet of a corpus.
+
+    Only one side of the game is simulated. Fleets are evaluated concurrently in
+    batches, each by a fresh agent, so that agents waiting on I/O or batched model
+    inference overlap with each other.
+
+    Args:
+        agent (AgentFactory): Creates a fresh agent for every fleet.
+        corpus (FleetCorpus): Fleets to destroy.
+        concurrency (int): Number of fleets evaluated at once.
+        max_shots (int): Number of shots after which an agent is stopped.
+
+    Returns:
+        np.ndarray with the number of shots taken for every fleet of the corpus.
+    """
+    board_dims = corpus.fleets.shape[1:]
+    results = np.zeros(len(corpus), dtype=np.int32)
+    for start in range(0, len(corpus), concurrency):
+        indices = range(start, min(start + concurrency, len(corpus)))
+        results[start : indices.stop] = await asyncio.gather(
+            *(
+                shots_to_clear(agent(), corpus[index], board_dims, max_shots)
+                for index in indices
+            )
+        )
+
+    return results
@@ -0,0 +1,199 @@
+import functools
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Awaitable, BinaryIO, Callable, Dict, Optional, Tuple
+
+import numpy as np
+from battleships.engine import BaseAgent
+from battleships.symmetry import canonical_board, inverse, transform_shot
+
+KEY_SIZE = 16
+# key followed by the row and column of the shot
+RECORD_SIZE = KEY_SIZE + 2
+
+ShootMethod = Callable[[BaseAgent, np.ndarray], Awaitable[Tuple[int, int]]]
+
+
+def board_key(board: np.ndarray, fleet: Optional[Dict[int, int]] = None) -> bytes:
+    """Hashes a masked board and optionally the remaining fleet into a compact key.
+
+    Args:
+        board (np.ndarray): Masked opponent's board.
+        fleet (Optional[Dict[int, int]]): Remaining ships by size.
+
+    Returns:
+        A KEY_SIZE bytes long key.
+    """
+    digest = hashlib.blake2b(digest_size=KEY_SIZE)
+    digest.update(bytes(board.shape))
+    digest.update(np.asarray(board, dtype=np.int8).tobytes())
+    if fleet is not None:
+        digest.update(bytes(v for item in sorted(fleet.items()) for v in item))
+    return digest.digest()
+
+
+class PolicyCache:
+    """LRU cache of shots keyed on masked board states.
+
+    Optionally persisted to an append-only file of fixed-size records, which is
+    loaded when the cache is created, so that positions evaluated in previous runs
+    cost a lookup as well. Every record is flushed as soon as it is written. Once
+    the file holds twice as many records as the cache can, it is rewritten with
+    the cached entries only. Caching is only valid for deterministic policies.
+
+    Shots outside of the board are not cached.
+
+    With symmetric set, boards are canonicalised first, so that rotations and
+    reflections of a position share a single entry.
+
+    Attributes:
+        maxsize (int): Maximum number of shots kept in memory.
+        path (Optional[str]): Path of the file the cache is persisted to.
+        symmetric (bool): Whether equivalent rotations and reflections share entries.
+    """
+
+    maxsize: int
+    path: Optional[str]
+    symmetric: bool
+    _shots: "OrderedDict[bytes, Tuple[int, int]]"
+    _file: Optional[BinaryIO]
+    _records: int
+
+    def __init__(
+        self,
+        maxsize: int = 100_000,
+        path: Optional[str] = None,
+        symmetric: bool = False,
+    ) -> None:
+        self.maxsize = maxsize
+        self.path = path
+        self.symmetric = symmetric
+        self._shots = OrderedDict()
+        self._file = None
+        self._records = 0
+
+        if path is not None:
+            if os.path.exists(path):
+                self._load(path)
+            self._file = open(path, "ab")
+            self._compact_if_needed()
+
+    def _load(self, path: str) -> None:
+        with open(path, "rb") as file:
+            data = file.read()
+
+        # a partially written last record is ignored
+        self._records = len(data) // RECORD_SIZE
+        for offset in range(0, self._records * RECORD_SIZE, RECORD_SIZE):
+            key = data[offset : offset + KEY_SIZE]
+            self._store(key, (data[offset + KEY_SIZE], data[offset + KEY_SIZE + 1]))
+
+    def _compact_if_needed(self) -> None:
+        """Rewrites the file with the cached entries once it grows too large.
+
+        Evicted entries which are computed again are appended again, so without
+        compaction the file would grow without bounds.
+        """
+        if self._records < 2 * self.maxsize:
+            return
+
+        # written to a temporary file first, so that a crash keeps the old one
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as file:
+            for key, shot in self._shots.items():
+                file.write(key + bytes(shot))
+
+        self._file.close()
+        os.replace(temporary, self.path)
+        self._file = open(self.path, "ab")
+        self._records = len(self._shots)
+
+    def _store(self, key: bytes, shot: Tuple[int, int]) -> None:
+        self._shots[key] = shot
+        self._shots.move_to_end(key)
+        if len(self._shots) > self.maxsize:
+            self._shots.popitem(last=False)
+
+    def get(
+        self, board: np.ndarray, fleet: Optional[Dict[int, int]] = None
+    ) -> Optional[Tuple[int, int]]:
+        """Returns the cached shot for a board state or None if there is none."""
+        t = 0
+        if self.symmetric:
+            board, t = canonical_board(board)
+
+        key = board_key(board, fleet)
+        shot = self._shots.get(key)
+        if shot is None:
+            return None
+
+        self._shots.move_to_end(key)
+        return transform_shot(shot, inverse(t), board.shape)
+
+    def put(
+        self,
+        board: np.ndarray,
+        shot: Tuple[int, int],
+        fleet: Optional[Dict[int, int]] = None,
+    ) -> None:
+        """Caches the shot chosen for a board state, if it is on the board.
+
+        Args:
+            board (np.ndarray): Masked opponent's board.
+            shot (Tuple[int, int]): Coordinates of the chosen shot.
+            fleet (Optional[Dict[int, int]]): Remaining ships by size.
+        """
+        shot = (int(shot[0]), int(shot[1]))
+        if not (0 <= shot[0] < board.shape[0] and 0 <= shot[1] < board.shape[1]):
+            return
+
+        if self.symmetric:
+            shape = board.shape
+            board, t = canonical_board(board)
+            shot = transform_shot(shot, t, shape)
+
+        key = board_key(board, fleet)
+        self._store(key, shot)
+
+        if self._file is not None:
+            self._file.write(key + bytes(shot))
+            self._file.flush()
+            self._records += 1
+            self._compact_if_needed()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __len__(self) -> int:
+        return len(self._shots)
+
+
+def cached_shoot(cache: PolicyCache) -> Callable[[ShootMethod], ShootMethod]:
+    """Decorates a deterministic BaseAgent.shoot implementation with a PolicyCache.
+
+    E.g.:
+
+        class Agent(BaseAgent):
+            @cached_shoot(PolicyCache(path="policy.cache"))
+            async def shoot(self, board: np.ndarray) -> Tuple[int, int]:
+                ...
+
+    Args:
+        cache (PolicyCache): Cache shared by all agents using the decorated method.
+    """
+
+    def decorator(shoot: ShootMethod) -> ShootMethod:
+        @functools.wraps(shoot)
+        async def wrapper(self: BaseAgent, board: np.ndarray) -> Tuple[int, int]:
+            shot = cache.get(board)
+            if shot is None:
+                shot = await shoot(self, board)
+                cache.put(board, shot)
+            return shot
+
+        return wrapper
+
+    return decorator
@@ -1,6 +1,18 @@
+import random
 from collections import deque
 from enum import IntEnum
-from typing import Any, AsyncGenerator, Deque, Dict, List, Literal, Optional, Set, Tuple
+from typing import (
+    Any,
+    AsyncGenerator,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+)
 
 import numpy as np
 from battleships.exceptions import (
@@ -76,6 +88,18 @@ class Ship:
         else:
             self.state = ShipState.DAMAGED
 
+    def repair(self) -> None:
+        """Reverts the most recent damage() call.
+
+        Decreases the number of shots taken by the ship.
+        Changes ship state appropriately.
+        """
+        self._shots_taken -= 1
+        if self._shots_taken == 0:
+            self.state = ShipState.HEALTHY
+        else:
+            self.state = ShipState.DAMAGED
+
     def validate(self) -> None:
         """Validates ship cells.
 
@@ -125,26 +149,130 @@ class Ship:
         return visited == self.ship_cells
 
 
+class LegalShots:
+    """Cells of a board which have not been shot at yet.
+
+    Cells are kept in a swap-remove array together with a map of their positions in
+    it, so that removing and restoring a cell, checking whether a cell is legal
+    and sampling a legal cell uniformly at random all take constant time.
+
+    Attributes:
+        size (Tuple[int, int]): size of a board.
+        _cells (List[int]): Flattened cell indices, legal ones first.
+        _positions (List[int]): Maps flattened cell indices to their position in _cells.
+        _count (int): Number of legal cells.
+    """
+
+    size: Tuple[int, int]
+    _cells: List[int]
+    _positions: List[int]
+    _count: int
+
+    def __init__(self, size: Tuple[int, int]) -> None:
+        self.size = size
+        self._cells = list(range(size[0] * size[1]))
+        self._positions = list(range(size[0] * size[1]))
+        self._count = len(self._cells)
+
+    def _index(self, cell: Tuple[int, int]) -> Optional[int]:
+        """Returns the flattened index of a cell or None if it is outside the board."""
+        if 0 <= cell[0] < self.size[0] and 0 <= cell[1] < self.size[1]:
+            return cell[0] * self.size[1] + cell[1]
+        return None
+
+    def _swap(self, position: int, other: int) -> None:
+        first, second = self._cells[position], self._cells[other]
+        self._cells[position], self._cells[other] = second, first
+        self._positions[first], self._positions[second] = other, position
+
+    def remove(self, cell: Tuple[int, int]) -> bool:
+        """Marks a cell as shot at.
+
+        Args:
+            cell (Tuple[int, int]): coordinates of the cell.
+
+        Returns:
+            True if the cell was legal before, False otherwise.
+        """
+        if cell not in self:
+            return False
+
+        self._count -= 1
+        self._swap(self._positions[cell[0] * self.size[1] + cell[1]], self._count)
+        return True
+
+    def add(self, cell: Tuple[int, int]) -> bool:
+        """Marks a cell as not shot at (e.g. when a shot is undone).
+
+        Args:
+            cell (Tuple[int, int]): coordinates of the cell.
+
+        Returns:
+            True if the cell was not legal before, False otherwise.
+        """
+        index = self._index(cell)
+        if index is None or self._positions[index] < self._count:
+            return False
+
+        self._swap(self._positions[index], self._count)
+        self._count += 1
+        return True
+
+    def sample(self) -> Tuple[int, int]:
+        """Returns a legal cell chosen uniformly at random.
+
+        Raises:
+            IndexError: If there are no legal cells left.
+        """
+        if not self._count:
+            raise IndexError("No legal shots left.")
+
+        y, x = divmod(self._cells[random.randrange(self._count)], self.size[1])
+        return y, x
+
+    def __contains__(self, cell: Tuple[int, int]) -> bool:
+        index = self._index(cell)
+        return index is not None and self._positions[index] < self._count
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        for index in self._cells[: self._count]:
+            y, x = divmod(index, self.size[1])
+            yield y, x
+
+    def __len__(self) -> int:
+        return self._count
+
+
 class Board:
     """Player's board with ships.
 
     Board is an array of size nxm (specified in size). Each cell in the array has a CellState.
     Board also stores all the ships it contains in the ships dictionary,
 
+    Every shot that changes the board is recorded in a journal, so that shots can be
+    undone cheaply (e.g. by search-based agents simulating hypothetical shots).
+
     Attributes:
         size (Tuple[int, int]): size of a board.
         ships_cells (Dict[Tuple[int, int], Ship]): Maps positions to ship references.
         board (np.ndarray): array of *size* representing the board.
+        legal_shots (LegalShots): Cells which have not been shot at yet.
+        _journal (List[Tuple[Tuple[int, int], Optional[Ship]]]): Shots that changed
+            the board, each with the ship it damaged (None for a miss).
     """
 
     size: Tuple[int, int]
     ships_cells: Dict[Tuple[int, int], Ship]
     board: np.ndarray
+    legal_shots: LegalShots
+    _journal: List[Tuple[Tuple[int, int], Optional[Ship]]]
 
     def __init__(self, size: Tuple[int, int]) -> None:
         self.size = size
         self.ships_cells = {}
         self.board = np.zeros(size)
+        self.legal_shots = LegalShots(size)
+        self._journal = []
 
     def _register_ship(self, ship: Ship) -> None:
         """Registers a single ship on the Board if it can be registered.
@@ -176,7 +304,7 @@ class Board:
                     f"Ship Cell {cell}" f" outside the board!"
                 )
 
-            if self.board[cell] == CellState.HEALTHY:
+            if self.board.item(cell) == CellState.HEALTHY:
                 raise ShipRegistrationException(
                     f"Ship cell {cell} already " f"occupied by another ship!"
                 )
@@ -201,28 +329,9 @@ class Board:
             Otherwise, returns Tuple[int, int] indicating coordinates of a cell
                 blocking the registration.
         """
-        y, x = cell
-        cells_to_check: Set[Tuple[int, int]] = {
-            (y - 1, x),
-            (y - 1, x + 1),
-            (y, x + 1),
-            (y + 1, x + 1),
-            (y + 1, x),
-            (y + 1, x - 1),
-            (y, x - 1),
-            (y - 1, x - 1),
-        }
-
-        for coord in cells_to_check:
-            if (
-                coord[0] < 0
-                or coord[0] >= self.size[0]
-                or coord[1] < 0
-                or coord[1] >= self.size[1]
-            ):
-                continue
-
-            if self.board[coord] == CellState.HEALTHY:
+        for coord in neighbours(cell, self.size):
+            # item() avoids slow comparisons of numpy scalars with enum members
+            if self.board.item(coord) == CellState.HEALTHY:
                 return coord
 
         return None
@@ -263,19 +372,21 @@ class Board:
         ):
             return ShotOutcome.INVALID_SHOT, None, []
 
-        cell_state = self.board[cell]
-
         # if player shoots in the same cell as before
-        if cell_state in (CellState.HIT, CellState.DESTROYED, CellState.MISS):
+        if not self.legal_shots.remove(cell):
             return ShotOutcome.REPEATED_SHOT, None, []
 
+        cell_state = self.board.item(cell)
+
         # missed
         if cell_state == CellState.EMPTY:
             self.board[cell] = CellState.MISS
+            self._journal.append((cell, None))
             return ShotOutcome.MISS, CellState.MISS, [cell]
 
         ship: Ship = self.ships_cells[cell]
         ship.damage()
+        self._journal.append((cell, ship))
 
         # respond with appropriate message
         if ship.state == ShipState.DAMAGED:
@@ -288,6 +399,54 @@ class Board:
 
         return ShotOutcome.DESTROYED, CellState.DESTROYED, list(ship.ship_cells)
 
+    def undo(self) -> bool:
+        """Reverts the most recent shot that changed the board.
+
+        Returns:
+            True if a shot was reverted, False if there was nothing to undo.
+        """
+        if not self._journal:
+            return False
+
+        cell, ship = self._journal.pop()
+        self.legal_shots.add(cell)
+
+        if ship is None:
+            self.board[cell] = CellState.EMPTY
+            return True
+
+        # a destroyed ship goes back to being damaged in all other cells
+        if ship.state == ShipState.DESTROYED:
+            for ship_cell in ship.ship_cells:
+                self.board[ship_cell] = CellState.HIT
+
+        self.board[cell] = CellState.HEALTHY
+        ship.repair()
+        return True
+
+    def snapshot(self) -> int:
+        """Marks the current state of the board.
+
+        Returns:
+            An opaque marker which can be passed to restore().
+        """
+        return len(self._journal)
+
+    def restore(self, snapshot: int) -> None:
+        """Reverts all shots made since a given snapshot was taken.
+
+        Args:
+            snapshot (int): Marker returned by snapshot().
+
+        Raises:
+            ValueError: If the snapshot is newer than the current state of the board.
+        """
+        if snapshot > len(self._journal):
+            raise ValueError("Cannot restore a snapshot newer than the board state.")
+
+        while len(self._journal) > snapshot:
+            self.undo()
+
     def get_masked_board(self) -> np.ndarray:
         """Returns a copy of the board with ship cells with masked ships.
 
@@ -327,8 +486,90 @@ class Board:
         )
 
 
+# offsets of the 8 cells surrounding a cell
+_NEIGHBOUR_OFFSETS = (
+    (-1, 0),
+    (-1, 1),
+    (0, 1),
+    (1, 1),
+    (1, 0),
+    (1, -1),
+    (0, -1),
+    (-1, -1),
+)
+
+
+def neighbours(cell: Tuple[int, int], size: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Returns the cells of a board surrounding a cell, diagonal ones included.
+
+    No other ship can occupy any of them next to a ship cell.
+
+    Args:
+        cell (Tuple[int, int]): coordinates of the cell.
+        size (Tuple[int, int]): size of the board.
+
+    Returns:
+        List of coordinates of the surrounding cells inside the board.
+    """
+    y, x = cell
+    return [
+        (y + dy, x + dx)
+        for dy, dx in _NEIGHBOUR_OFFSETS
+        if 0 <= y + dy < size[0] and 0 <= x + dx < size[1]
+    ]
+
+
+def remove_destroyed_ship(remaining_ships: Dict[int, int], size: int) -> None:
+    """Removes a destroyed ship from a fleet, unless none of its size is left.
+
+    Args:
+        remaining_ships (Dict[int, int]): Number of remaining ships of every size.
+        size (int): Size of the destroyed ship.
+    """
+    if remaining_ships.get(size):
+        remaining_ships[size] -= 1
+
+
+def track_destroyed_ship(
+    cells: List[Tuple[int, int]],
+    inferred_empty: np.ndarray,
+    remaining_ships: Dict[int, int],
+) -> None:
+    """Updates what is known about the opponent's board after destroying a ship.
+
+    Ships never touch, so all cells around a destroyed ship are marked as empty.
+
+    Args:
+        cells (List[Tuple[int, int]]): Cells of the destroyed ship.
+        inferred_empty (np.ndarray): Mask of cells known to be empty.
+        remaining_ships (Dict[int, int]): Number of remaining ships of every size.
+    """
+    for cell in cells:
+        for coord in neighbours(cell, inferred_empty.shape):
+            if coord not in cells:
+                inferred_empty[coord] = True
+
+    remove_destroyed_ship(remaining_ships, len(cells))
+
+
 class BaseAgent:
-    """A base agent."""
+    """A base agent.
+
+    The attributes below are kept up to date by the game runner once the game starts,
+    so that agents do not need to work them out from the board on every shot.
+
+    Attributes:
+        legal_shots (Optional[LegalShots]): Cells of the opponent's board which have not
+            been shot at yet.
+        inferred_empty (Optional[np.ndarray]): Boolean mask of cells around the
+            opponent's destroyed ships, which cannot contain a ship.
+        remaining_ships (Optional[Dict[int, int]]): Number of the opponent's ships of
+            every size which have not been destroyed yet.
+    """
+
+    legal_shots: Optional[LegalShots] = None
+    inferred_empty: Optional[np.ndarray] = None
+    remaining_ships: Optional[Dict[int, int]] = None
 
     async def get_ships(self) -> List[Set[Tuple[int, int]]]:
         """Returns coordinates of ship cells to create ship objects.
@@ -372,13 +613,24 @@ class Game:
 
     Manages player's ship registration and game logic.
 
+    Every player gets its own copy of the legal shots on the opponent's board, so that
+    agents modifying it cannot affect the game.
+
     Attributes:
         player1 (Player): First player.
         player2 (Player): Second player.
+        legal_shots (Tuple[LegalShots, LegalShots]): Legal shots of each player.
+        inferred_empty (Tuple[np.ndarray, np.ndarray]): Cells of the opponent's board
+            each player knows to be empty.
+        remaining_ships (Tuple[Dict[int, int], Dict[int, int]]): Opponent's ships each
+            player has not destroyed yet.
     """
 
     player1: BaseAgent
     player2: BaseAgent
+    legal_shots: Tuple[LegalShots, LegalShots]
+    inferred_empty: Tuple[np.ndarray, np.ndarray]
+    remaining_ships: Tuple[Dict[int, int], Dict[int, int]]
 
     def __init__(self, player1: BaseAgent, player2: BaseAgent) -> None:
         self.player1 = player1
@@ -387,10 +639,49 @@ class Game:
         self.board1 = Board(SETTINGS["BOARD_DIMS"])
         self.board2 = Board(SETTINGS["BOARD_DIMS"])
 
+        self.legal_shots = (
+            LegalShots(SETTINGS["BOARD_DIMS"]),
+            LegalShots(SETTINGS["BOARD_DIMS"]),
+        )
+        self.inferred_empty = (
+            np.zeros(SETTINGS["BOARD_DIMS"], dtype=bool),
+            np.zeros(SETTINGS["BOARD_DIMS"], dtype=bool),
+        )
+        self.remaining_ships = (
+            dict(SETTINGS["ALLOWED_SHIPS"]),
+            dict(SETTINGS["ALLOWED_SHIPS"]),
+        )
+        # opponent's ships still afloat for each player, kept apart from the state
+        # exposed to agents, so that agents cannot change who wins
+        self._ships_afloat = [0, 0]
+
     async def initialize(self) -> None:
         """Initialize the game."""
-        self.board1.register_ships(await self._get_ships(self.player1))
-        self.board2.register_ships(await self._get_ships(self.player2))
+        ships1 = await self._get_ships(self.player1)
+        ships2 = await self._get_ships(self.player2)
+        self.board1.register_ships(ships1)
+        self.board2.register_ships(ships2)
+        self._ships_afloat = [len(ships2), len(ships1)]
+
+        self._expose_state(1)
+        self._expose_state(0)
+
+    def _expose_state(self, player_index: int) -> BaseAgent:
+        """Hands a player the state kept for it by the game.
+
+        Done before every shot, so that the same agent can play both sides.
+
+        Args:
+            player_index (int): Index of the player (0 or 1).
+
+        Returns:
+            The player's agent.
+        """
+        player = self.player1 if player_index == 0 else self.player2
+        player.legal_shots = self.legal_shots[player_index]
+        player.inferred_empty = self.inferred_empty[player_index]
+        player.remaining_ships = self.remaining_ships[player_index]
+        return player
 
     async def _get_ships(self, player: BaseAgent) -> List[Ship]:
         """Get ships from an agent.
@@ -461,13 +752,51 @@ class Game:
         current_player = 0
 
         while self._is_game_running():
-            if current_player == 0:
-                shot = await self.player1.shoot(self.board2.get_masked_board())
-                outcome, cell_state, changes = self.board2.shoot(shot)
-            else:
-                shot = await self.player2.shoot(self.board1.get_masked_board())
-                outcome, cell_state, changes = self.board1.shoot(shot)
+            shot, outcome, cell_state, changes = await self.play_shot(current_player)
 
             yield current_player, shot, outcome, cell_state, changes
 
             current_player ^= 1
+
+    async def play_shot(
+        self, player_index: int, masked_board: Optional[np.ndarray] = None
+    ) -> Tuple[
+        Tuple[int, int], ShotOutcome, Optional[CellState], List[Tuple[int, int]]
+    ]:
+        """Makes a single shot of a player and updates the state kept for it.
+
+        Args:
+            player_index (int): Index of the shooting player (0 or 1).
+            masked_board (Optional[np.ndarray]): Masked opponent's board handed to the
+                player, if the caller keeps one up to date. Copied from the
+                opponent's board otherwise.
+
+        Returns:
+            Tuple of the shot, its outcome, the new state of the changed cells and
+                the changed cells.
+        """
+        player = self._expose_state(player_index)
+        board = self.board2 if player_index == 0 else self.board1
+
+        if masked_board is None:
+            masked_board = board.get_masked_board()
+
+        shot = await player.shoot(masked_board)
+        outcome, cell_state, changes = board.shoot(shot)
+
+        for cell in changes:
+            self.legal_shots[player_index].remove(cell)
+
+        if outcome == ShotOutcome.DESTROYED:
+            self._ships_afloat[player_index] -= 1
+            track_destroyed_ship(
+                changes,
+                self.inferred_empty[player_index],
+                self.remaining_ships[player_index],
+            )
+
+        return shot, outcome, cell_state, changes
+
+    def has_won(self, player_index: int) -> bool:
+        """Checks whether a player has destroyed all of the opponent's ships."""
+        return not self._ships_afloat[player_index]
@@ -2,6 +2,7 @@ import random
 from typing import Dict, List, Optional, Set, Tuple
 
 from battleships import Board, Ship
+from battleships.engine import neighbours
 from battleships.exceptions import ImpossibleShipGenerationException
 
 
@@ -102,26 +103,7 @@ def _generate_ships(
                 cells_to_populate.remove((y, x))
 
             # reserve all cells around the ship as well and remove them from cells_to_populate
-            cells_to_check: Set[Tuple[int, int]] = {
-                (y - 1, x),
-                (y - 1, x + 1),
-                (y, x + 1),
-                (y + 1, x + 1),
-                (y + 1, x),
-                (y + 1, x - 1),
-                (y, x - 1),
-                (y - 1, x - 1),
-            }
-
-            for coord in cells_to_check:
-                if (
-                    coord[0] < 0
-                    or coord[0] >= board.size[0]
-                    or coord[1] < 0
-                    or coord[1] >= board.size[1]
-                ):
-                    continue
-
+            for coord in neighbours((y, x), board.size):
                 if coord in cells_to_populate:
                     cells_to_populate.remove(coord)
 
@@ -0,0 +1,406 @@
+import random
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from battleships.engine import SETTINGS, CellState, neighbours, remove_destroyed_ship
+
+# (index of the ship size, cells of the ship, cells around the ship)
+Placement = Tuple[int, int, int]
+Fleet = Tuple[int, ...]
+
+
+class SolverResult(NamedTuple):
+    """Per-cell occupancy probabilities of the remaining fleet.
+
+    Attributes:
+        probabilities (np.ndarray): Probability of every cell being a ship cell.
+            Cells which are known to be ship cells (HIT) have probability 1.
+        configurations (Optional[int]): Number of fleet configurations consistent
+            with the board, None if the probabilities were sampled.
+        exact (bool): Whether the probabilities are exact.
+    """
+
+    probabilities: np.ndarray
+    configurations: Optional[int]
+    exact: bool
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+def ship_shapes(size: int) -> List[Tuple[Tuple[int, int], ...]]:
+    """Returns all shapes a ship of a given size can take.
+
+    Every shape is a tuple of cell offsets relative to its first cell in row-major
+    order, so that all offsets are (0, dx >= 0) or (dy > 0, dx).
+
+    Args:
+        size (int): Number of ship cells.
+
+    Returns:
+        List of all distinct (not rotated or reflected) shapes.
+    """
+    shapes: Set[FrozenSet[Tuple[int, int]]] = {frozenset({(0, 0)})}
+    for _ in range(size - 1):
+        grown: Set[FrozenSet[Tuple[int, int]]] = set()
+        for shape in shapes:
+            for y, x in shape:
+                for cell in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)):
+                    if cell not in shape:
+                        new_shape = shape | {cell}
+                        anchor = min(new_shape)
+                        grown.add(
+                            frozenset(
+                                (cy - anchor[0], cx - anchor[1]) for cy, cx in new_shape
+                            )
+                        )
+        shapes = grown
+
+    return sorted(tuple(sorted(shape)) for shape in shapes)
+
+
+def remaining_fleet(board: np.ndarray) -> Dict[int, int]:
+    """Works out which ships have not been destroyed yet.
+
+    Args:
+        board (np.ndarray): Masked opponent's board.
+
+    Returns:
+        Dict[int, int] mapping ship sizes to the number of remaining ships.
+    """
+    fleet: Dict[int, int] = dict(SETTINGS["ALLOWED_SHIPS"])
+    visited: Set[Tuple[int, int]] = set()
+
+    for y, x in zip(*np.nonzero(board == CellState.DESTROYED)):
+        if (y, x) in visited:
+            continue
+
+        # ships never touch, so every connected group of destroyed cells is a ship
+        size = 0
+        stack = [(int(y), int(x))]
+        visited.add(stack[0])
+        while stack:
+            cy, cx = stack.pop()
+            size += 1
+            for cell in ((cy - 1, cx), (cy + 1, cx), (cy, cx - 1), (cy, cx + 1)):
+                if (
+                    0 <= cell[0] < board.shape[0]
+                    and 0 <= cell[1] < board.shape[1]
+                    and cell not in visited
+                    and board[cell] == CellState.DESTROYED
+                ):
+                    visited.add(cell)
+                    stack.append(cell)
+
+        remove_destroyed_ship(fleet, size)
+
+    return fleet
+
+
+class FleetSolver:
+    """Counts placements of the remaining fleet consistent with a masked board.
+
+    Cells are scanned in row-major order. At every cell the solver either leaves it
+    empty or anchors there a ship whose first cell it is, so every configuration is
+    counted exactly once. The state at a cell is the remaining fleet and the profile
+    of cells ahead of it already blocked by ships and their surroundings, which is
+    memoized in a bounded LRU cache. If counting exceeds its share of the time
+    budget, the probabilities are estimated by sampling in the rest of it instead.
+
+    Attributes:
+        cache_size (int): Maximum number of memoized states.
+        time_budget (float): Seconds allowed for computing the probabilities.
+        samples (int): Maximum number of fleets sampled when exact counting is too
+            slow. Sampling stops earlier when the time budget runs out.
+        exact_share (float): Fraction of the time budget allowed for exact counting.
+    """
+
+    cache_size: int
+    time_budget: float
+    samples: int
+    exact_share: float
+
+    def __init__(
+        self,
+        cache_size: int = 1_000_000,
+        time_budget: float = 1.0,
+        samples: int = 2000,
+        exact_share: float = 0.5,
+    ) -> None:
+        self.cache_size = cache_size
+        self.time_budget = time_budget
+        self.samples = samples
+        self.exact_share = exact_share
+
+    def solve(
+        self, board: np.ndarray, fleet: Optional[Dict[int, int]] = None
+    ) -> SolverResult:
+        """Computes occupancy probabilities of the remaining fleet.
+
+        Args:
+            board (np.ndarray): Masked opponent's board.
+            fleet (Optional[Dict[int, int]]): Remaining ships by size.
+                Worked out from the board if not given.
+
+        Returns:
+            SolverResult with the probabilities.
+        """
+        if fleet is None:
+            fleet = remaining_fleet(board)
+
+        start = time.monotonic()
+        self._prepare(board, fleet)
+
+        self._deadline = start + self.exact_share * self.time_budget
+        try:
+            total, occupancy = self._count_exact()
+        except _BudgetExceeded:
+            total = None
+        finally:
+            self._cache.clear()
+
+        if total is None:
+            self._deadline = start + self.time_budget
+            return self._sample()
+
+        if total == 0:
+            return SolverResult(np.zeros(board.shape), 0, True)
+
+        probabilities = np.array([count / total for count in occupancy])
+        return SolverResult(probabilities.reshape(board.shape), total, True)
+
+    def _prepare(self, board: np.ndarray, fleet: Dict[int, int]) -> None:
+        """Precomputes all ship placements allowed by the known cells."""
+        height, width = board.shape
+        self._shape = (height, width)
+        self._sizes = sorted(size for size, count in fleet.items() if count > 0)
+        self._fleet = tuple(fleet[size] for size in self._sizes)
+        self._cache: "OrderedDict[Tuple[int, Fleet, int], int]" = OrderedDict()
+
+        # cells which cannot be ship cells: misses, destroyed ships and their surroundings
+        forbidden = (board == CellState.MISS) | (board == CellState.DESTROYED)
+        for y, x in zip(*np.nonzero(board == CellState.DESTROYED)):
+            for cell in neighbours((int(y), int(x)), (height, width)):
+                forbidden[cell] = True
+
+        hits = board == CellState.HIT
+        self._hits = sum(1 << int(index) for index in np.flatnonzero(hits))
+
+        self._placements: List[List[Placement]] = [[] for _ in range(height * width)]
+        self._placement_cells: Dict[Tuple[int, int], List[int]] = {}
+        # the exact count only needs cells after the anchor, sampling needs all of them
+        self._placement_halos: Dict[Tuple[int, int], int] = {}
+        for index, size in enumerate(self._sizes):
+            for shape in ship_shapes(size):
+                for y in range(height):
+                    for x in range(width):
+                        cells = [(y + dy, x + dx) for dy, dx in shape]
+                        if not all(
+                            0 <= cy < height
+                            and 0 <= cx < width
+                            and not forbidden[cy, cx]
+                            for cy, cx in cells
+                        ):
+                            continue
+
+                        # a fully hit ship would have been destroyed
+                        if all(hits[cell] for cell in cells):
+                            continue
+
+                        # hit cells next to a ship have to belong to it
+                        halo = {
+                            cell
+                            for ship_cell in cells
+                            for cell in neighbours(ship_cell, (height, width))
+                        } - set(cells)
+                        if any(hits[cell] for cell in halo):
+                            continue
+
+                        anchor = y * width + x
+                        cells_mask = sum(1 << (cy * width + cx) for cy, cx in cells)
+                        halo_mask = sum(1 << (cy * width + cx) for cy, cx in halo)
+                        self._placements[anchor].append(
+                            (index, cells_mask >> anchor, halo_mask >> anchor)
+                        )
+                        self._placement_cells[(anchor, cells_mask >> anchor)] = [
+                            cy * width + cx for cy, cx in cells
+                        ]
+                        self._placement_halos[(anchor, cells_mask >> anchor)] = (
+                            halo_mask
+                        )
+
+    def _check_budget(self) -> None:
+        self._calls += 1
+        if self._calls % 1024 == 1 and time.monotonic() > self._deadline:
+            raise _BudgetExceeded
+
+    def _count(self, position: int, fleet: Fleet, blocked: int) -> int:
+        """Counts completions of a partial configuration.
+
+        Args:
+            position (int): Index of the current cell in row-major order.
+            fleet (Fleet): Number of remaining ships of every size.
+            blocked (int): Bitmask of blocked cells, bit 0 being the current cell.
+
+        Returns:
+            Number of ways of placing the remaining fleet from the current cell on.
+        """
+        key = (position, fleet, blocked)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        self._check_budget()
+
+        if not any(fleet):
+            # every hit cell has to be covered by a ship
+            result = int(not (self._hits >> position) & ~blocked)
+        elif position == len(self._placements):
+            result = 0
+        else:
+            result = sum(
+                self._count(position + 1, next_fleet, next_blocked)
+                for _, next_fleet, next_blocked in self._transitions(
+                    position, fleet, blocked
+                )
+            )
+
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return result
+
+    def _transitions(self, position: int, fleet: Fleet, blocked: int):
+        """Yields (placement cells or None, fleet, blocked) for every choice at a cell."""
+        if blocked & 1:
+            yield None, fleet, blocked >> 1
+            return
+
+        if not (self._hits >> position) & 1:
+            yield None, fleet, blocked >> 1
+
+        for index, cells, halo in self._placements[position]:
+            if fleet[index] and not cells & blocked:
+                next_fleet = fleet[:index] + (fleet[index] - 1,) + fleet[index + 1 :]
+                yield cells, next_fleet, (blocked | cells | halo) >> 1
+
+    def _count_exact(self) -> Tuple[int, List[int]]:
+        """Counts all configurations and configurations occupying every cell.
+
+        Completions are counted backwards by _count, while the number of ways of
+        reaching every state is propagated forwards cell by cell.
+        """
+        self._calls = 0
+
+        total = self._count(0, self._fleet, 0)
+        occupancy = [0] * len(self._placements)
+        if total == 0:
+            return total, occupancy
+
+        layer: Dict[Tuple[Fleet, int], int] = {(self._fleet, 0): 1}
+        for position in range(len(self._placements)):
+            next_layer: Dict[Tuple[Fleet, int], int] = defaultdict(int)
+            for (fleet, blocked), ways in layer.items():
+                self._check_budget()
+                for cells, next_fleet, next_blocked in self._transitions(
+                    position, fleet, blocked
+                ):
+                    completions = self._count(position + 1, next_fleet, next_blocked)
+                    if not completions:
+                        continue
+
+                    next_layer[(next_fleet, next_blocked)] += ways
+                    if cells is not None:
+                        for cell in self._placement_cells[(position, cells)]:
+                            occupancy[cell] += ways * completions
+
+            layer = next_layer
+
+        return total, occupancy
+
+    def _sample(self) -> SolverResult:
+        """Estimates the probabilities from randomly placed fleets.
+
+        Ships covering hit cells are placed first, then the remaining ships from the
+        largest, each uniformly among the placements still possible. Every fleet is
+        weighted by the inverse of the probability of sampling it, so that the
+        estimate is not biased towards fleets with few alternatives. Sampling stops
+        at the deadline, as soon as there is an estimate.
+        """
+        size = len(self._placements)
+        by_size: List[List[Tuple[int, int]]] = [[] for _ in self._sizes]
+        covering: List[List[Tuple[int, int, int]]] = [[] for _ in range(size)]
+        for anchor, placements in enumerate(self._placements):
+            for index, cells, _ in placements:
+                cells_mask = cells << anchor
+                halo_mask = self._placement_halos[(anchor, cells)]
+                by_size[index].append((cells_mask, halo_mask))
+                for cell in self._placement_cells[(anchor, cells)]:
+                    covering[cell].append((index, cells_mask, halo_mask))
+
+        hit_cells = [cell for cell in range(size) if (self._hits >> cell) & 1]
+        occupancy = np.zeros(size)
+        total_weight = 0.0
+
+        for _ in range(self.samples):
+            if total_weight and time.monotonic() > self._deadline:
+                break
+
+            fleet = list(self._fleet)
+            occupied = 0
+            blocked = 0
+            weight = 1.0
+
+            for cell in hit_cells:
+                if (occupied >> cell) & 1:
+                    continue
+
+                options = [
+                    (index, cells, halo)
+                    for index, cells, halo in covering[cell]
+                    if fleet[index] and not cells & blocked
+                ]
+                if not options:
+                    weight = 0.0
+                    break
+
+                index, cells, halo = random.choice(options)
+                weight *= len(options)
+                fleet[index] -= 1
+                occupied |= cells
+                blocked |= cells | halo
+
+            # identical ships can be placed in any order
+            for index in reversed(range(len(fleet)) if weight else []):
+                for count in range(fleet[index], 0, -1):
+                    options = [
+                        (cells, halo)
+                        for cells, halo in by_size[index]
+                        if not cells & blocked
+                    ]
+                    if not options:
+                        weight = 0.0
+                        break
+
+                    cells, halo = random.choice(options)
+                    weight *= len(options) / count
+                    occupied |= cells
+                    blocked |= cells | halo
+
+            if not weight:
+                continue
+
+            total_weight += weight
+            for cell in range(size):
+                if (occupied >> cell) & 1:
+                    occupancy[cell] += weight
+
+        if total_weight:
+            occupancy /= total_weight
+
+        return SolverResult(occupancy.reshape(self._shape), None, False)
@@ -0,0 +1,320 @@
+import json
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from battleships.engine import ShotOutcome
+
+
+class RunningStats:
+    """Count, mean, variance and range of a stream of values in constant memory.
+
+    Attributes:
+        count (int): Number of values seen.
+        mean (float): Mean of the values.
+        minimum (float): Smallest value seen.
+        maximum (float): Largest value seen.
+        _m2 (float): Sum of squared differences from the mean.
+    """
+
+    count: int
+    mean: float
+    minimum: float
+    maximum: float
+    _m2: float
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self._m2 = 0.0
+
+    def update(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def merge(self, other: "RunningStats") -> None:
+        """Adds values seen by another RunningStats (e.g. of a worker process)."""
+        if not other.count:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta**2 * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": math.sqrt(self.variance),
+            "min": self.minimum if self.count else None,
+            "max": self.maximum if self.count else None,
+        }
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch of positive values with bounded relative error.
+
+    Values are counted in logarithmically sized buckets, so that every quantile is
+    estimated within relative_accuracy of its true value. Once there are more than
+    max_buckets buckets, the lowest ones are collapsed together, which keeps memory
+    constant at the cost of accuracy of the lowest quantiles only.
+
+    Attributes:
+        relative_accuracy (float): Relative error of the estimated quantiles.
+        max_buckets (int): Maximum number of buckets kept.
+        count (int): Number of values seen.
+        _buckets (Dict[int, int]): Number of values in every bucket.
+        _zeros (int): Number of values too small to be bucketed.
+    """
+
+    relative_accuracy: float
+    max_buckets: int
+    count: int
+    _buckets: Dict[int, int]
+    _zeros: int
+
+    # values below this are counted as zeros
+    MIN_VALUE = 1e-9
+
+    def __init__(
+        self, relative_accuracy: float = 0.01, max_buckets: int = 2048
+    ) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.count = 0
+        self._buckets = {}
+        self._zeros = 0
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+    def update(self, value: float) -> None:
+        self.count += 1
+        if value < self.MIN_VALUE:
+            self._zeros += 1
+            return
+
+        bucket = math.ceil(math.log(value) / self._log_gamma)
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+        self._collapse()
+
+    def _collapse(self) -> None:
+        while len(self._buckets) > self.max_buckets:
+            lowest, second = sorted(self._buckets)[:2]
+            self._buckets[second] += self._buckets.pop(lowest)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Adds values seen by another sketch with the same relative accuracy."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracies.")
+
+        self.count += other.count
+        self._zeros += other._zeros
+        for bucket, count in other._buckets.items():
+            self._buckets[bucket] = self._buckets.get(bucket, 0) + count
+        self._collapse()
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Returns an estimate of the q-quantile or None if no values were seen."""
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self._zeros
+        if rank < seen:
+            return 0.0
+
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if rank < seen:
+                return 2 * self._gamma**bucket / (self._gamma + 1)
+
+        return 2 * self._gamma ** max(self._buckets) / (self._gamma + 1)
+
+    def to_dict(
+        self, quantiles: Tuple[float, ...] = (0.5, 0.9, 0.99)
+    ) -> Dict[str, Any]:
+        return {str(q): self.quantile(q) for q in quantiles}
+
+
+class AgentStats:
+    """Statistics of a single agent across all of its games.
+
+    Attributes:
+        games (int): Number of games played.
+        wins (int): Number of games won.
+        outcomes (List[int]): Number of shots with every ShotOutcome.
+        shots_to_win (RunningStats): Shots taken in games won by sinking all ships.
+        shots_to_win_quantiles (QuantileSketch): Quantiles of shots_to_win.
+        latency (RunningStats): Seconds taken by every move.
+        latency_quantiles (QuantileSketch): Seconds taken by every move.
+    """
+
+    games: int
+    wins: int
+    outcomes: List[int]
+    shots_to_win: RunningStats
+    shots_to_win_quantiles: QuantileSketch
+    latency: RunningStats
+    latency_quantiles: QuantileSketch
+
+    def __init__(self) -> None:
+        self.games = 0
+        self.wins = 0
+        self.outcomes = [0] * len(ShotOutcome)
+        self.shots_to_win = RunningStats()
+        self.shots_to_win_quantiles = QuantileSketch()
+        self.latency = RunningStats()
+        self.latency_quantiles = QuantileSketch()
+
+    def merge(self, other: "AgentStats") -> None:
+        self.games += other.games
+        self.wins += other.wins
+        self.outcomes = [a + b for a, b in zip(self.outcomes, other.outcomes)]
+        self.shots_to_win.merge(other.shots_to_win)
+        self.shots_to_win_quantiles.merge(other.shots_to_win_quantiles)
+        self.latency.merge(other.latency)
+        self.latency_quantiles.merge(other.latency_quantiles)
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fraction of shots which hit or destroyed a ship."""
+        hits = self.outcomes[ShotOutcome.HIT] + self.outcomes[ShotOutcome.DESTROYED]
+        return hits / sum(self.outcomes) if sum(self.outcomes) else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "games": self.games,
+            "wins": self.wins,
+            "win_rate": self.wins / self.games if self.games else None,
+            "outcomes": {
+                outcome.name: self.outcomes[outcome] for outcome in ShotOutcome
+            },
+            "hit_ratio": self.hit_ratio,
+            "shots_to_win": {
+                **self.shots_to_win.to_dict(),
+                "quantiles": self.shots_to_win_quantiles.to_dict(),
+            },
+            "latency": {
+                **self.latency.to_dict(),
+                "quantiles": self.latency_quantiles.to_dict(),
+            },
+        }
+
+
+class TournamentStats:
+    """Constant-memory statistics of a stream of games.
+
+    Statistics of every agent and every pairing of agents are updated as shots and
+    games are recorded, without keeping results of individual games. Partial
+    statistics gathered in different processes can be combined with merge().
+
+    Attributes:
+        agents (Dict[str, AgentStats]): Statistics of every agent.
+        pairings (Dict[Tuple[str, str], Tuple[AgentStats, AgentStats]]): Statistics
+            of each agent of a pairing in games against the other one. Pairings are
+            sorted by name.
+    """
+
+    agents: Dict[str, AgentStats]
+    pairings: Dict[Tuple[str, str], Tuple[AgentStats, AgentStats]]
+
+    def __init__(self) -> None:
+        self.agents = {}
+        self.pairings = {}
+
+    def _agent(self, name: str) -> AgentStats:
+        if name not in self.agents:
+            self.agents[name] = AgentStats()
+        return self.agents[name]
+
+    def _pairing(self, name: str, opponent: str) -> AgentStats:
+        """Returns statistics of an agent in games against an opponent."""
+        pairing = (min(name, opponent), max(name, opponent))
+        if pairing not in self.pairings:
+            self.pairings[pairing] = (AgentStats(), AgentStats())
+        return self.pairings[pairing][pairing.index(name)]
+
+    def record_shot(
+        self,
+        name: str,
+        outcome: ShotOutcome,
+        latency: float,
+        opponent: Optional[str] = None,
+    ) -> None:
+        """Records a single move of an agent.
+
+        Args:
+            name (str): Name of the agent.
+            outcome (ShotOutcome): Outcome of the shot.
+            latency (float): Seconds taken by the move.
+            opponent (Optional[str]): Name of the opponent, if pairing statistics
+                should be updated as well.
+        """
+        agent_stats = [self._agent(name)]
+        if opponent is not None:
+            agent_stats.append(self._pairing(name, opponent))
+
+        for stats in agent_stats:
+            stats.outcomes[outcome] += 1
+            stats.latency.update(latency)
+            stats.latency_quantiles.update(latency)
+
+    def record_game(self, winner: str, loser: str, shots: Optional[int]) -> None:
+        """Records a finished game.
+
+        Args:
+            winner (str): Name of the winning agent.
+            loser (str): Name of the losing agent.
+            shots (Optional[int]): Number of shots taken by the winner, None if the
+                loser forfeited the game.
+        """
+        for winner_stats, loser_stats in (
+            (self._agent(winner), self._agent(loser)),
+            (self._pairing(winner, loser), self._pairing(loser, winner)),
+        ):
+            winner_stats.games += 1
+            winner_stats.wins += 1
+            loser_stats.games += 1
+            if shots is not None:
+                winner_stats.shots_to_win.update(shots)
+                winner_stats.shots_to_win_quantiles.update(shots)
+
+    def merge(self, other: "TournamentStats") -> None:
+        """Adds statistics gathered by another TournamentStats (e.g. of a worker process)."""
+        for name, stats in other.agents.items():
+            self._agent(name).merge(stats)
+
+        for (first, second), (first_stats, second_stats) in other.pairings.items():
+            self._pairing(first, second).merge(first_stats)
+            self._pairing(second, first).merge(second_stats)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns a JSON-serializable summary of the statistics so far."""
+        return {
+            "agents": {name: stats.to_dict() for name, stats in self.agents.items()},
+            "pairings": [
+                {
+                    "agents": list(pairing),
+                    "stats": [pairing_stats.to_dict() for pairing_stats in stats],
+                }
+                for pairing, stats in self.pairings.items()
+            ],
+        }
+
+    def save(self, path: str) -> None:
+        """Writes a snapshot of the statistics to a JSON file."""
+        with open(path, "w") as file:
+            json.dump(self.snapshot(), file, indent=2)
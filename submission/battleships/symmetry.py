@@ -0,0 +1,164 @@
+from typing import List, Set, Tuple
+
+import numpy as np
+
+# Transforms are numbered 0-7: transform t rotates the board t % 4 times by 90 degrees
+# anticlockwise (as np.rot90) and then, if t >= 4, mirrors it left to right.
+TRANSFORMS = range(8)
+
+
+def transforms(shape: Tuple[int, int]) -> List[int]:
+    """Returns the transforms which map a board of a given shape onto itself.
+
+    All 8 rotations and reflections for square boards, otherwise only the 4 which
+    do not swap rows with columns.
+    """
+    if shape[0] == shape[1]:
+        return list(TRANSFORMS)
+    return [t for t in TRANSFORMS if t % 4 in (0, 2)]
+
+
+def inverse(t: int) -> int:
+    """Returns the transform undoing transform t."""
+    # reflections are their own inverses
+    if t >= 4:
+        return t
+    return (4 - t) % 4
+
+
+def transform_board(board: np.ndarray, t: int) -> np.ndarray:
+    """Applies transform t to a board (or a stack of boards in the last two axes)."""
+    transformed = np.rot90(board, t % 4, axes=(-2, -1))
+    if t >= 4:
+        transformed = np.flip(transformed, axis=-1)
+    return transformed
+
+
+def transform_cells(cells: np.ndarray, t: int, shape: Tuple[int, int]) -> np.ndarray:
+    """Applies transform t to cell coordinates.
+
+    Args:
+        cells (np.ndarray): Array of (row, column) coordinates of shape (n, 2).
+        t (int): Transform to apply.
+        shape (Tuple[int, int]): Shape of the board before the transform.
+
+    Returns:
+        np.ndarray of the transformed coordinates.
+    """
+    y, x = np.asarray(cells).reshape(-1, 2).T
+    height, width = shape
+    for _ in range(t % 4):
+        # rotating by 90 degrees anticlockwise moves (y, x) to (width - 1 - x, y)
+        y, x = width - 1 - x, y
+        height, width = width, height
+    if t >= 4:
+        x = width - 1 - x
+    return np.stack([y, x], axis=-1)
+
+
+def transform_shot(
+    shot: Tuple[int, int], t: int, shape: Tuple[int, int]
+) -> Tuple[int, int]:
+    """Applies transform t to coordinates of a single shot."""
+    y, x = transform_cells(np.array([shot]), t, shape)[0]
+    return int(y), int(x)
+
+
+def canonical_board(board: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Maps a board to the canonical representative of its symmetry class.
+
+    The canonical board is the lexicographically smallest of all its rotations and
+    reflections, so that equivalent boards share a single representative.
+
+    Args:
+        board (np.ndarray): Board to canonicalise.
+
+    Returns:
+        Tuple of the canonical board and the transform mapping board onto it.
+
+    Raises:
+        ValueError: If board is not two-dimensional, see canonical_boards() for
+            stacks of boards.
+    """
+    if board.ndim != 2:
+        raise ValueError("Expected a single board, use canonical_boards() for stacks.")
+
+    candidates = transforms(board.shape)
+    flat = np.stack([transform_board(board, t).ravel() for t in candidates])
+
+    # np.lexsort treats its last key as the primary one
+    t = candidates[np.lexsort(flat.T[::-1])[0]]
+    return transform_board(board, t), t
+
+
+def canonical_boards(boards: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Maps every board of a stack to the canonical representative of its class.
+
+    Equivalent to calling canonical_board() on every board, but vectorized over the
+    stack, e.g. for exporting datasets.
+
+    Args:
+        boards (np.ndarray): Stack of boards of shape (number of boards, *board dims).
+
+    Returns:
+        Tuple of the canonical boards and the transform mapping each board onto its
+            canonical one.
+
+    Raises:
+        ValueError: If boards is not a stack of two-dimensional boards.
+    """
+    if boards.ndim != 3:
+        raise ValueError("Expected a stack of boards.")
+
+    candidates = transforms(boards.shape[1:])
+    transformed = np.stack([transform_board(boards, t) for t in candidates])
+    flat = transformed.reshape(len(candidates), len(boards), -1)
+
+    # candidates are narrowed down cell by cell to those with the smallest values
+    # so far, the first remaining one wins ties, as with np.lexsort
+    smallest = np.ones((len(boards), len(candidates)), dtype=bool)
+    maximum = flat.max() if flat.size else 0
+    for cell in range(flat.shape[2]):
+        values = np.where(smallest, flat[:, :, cell].T, maximum)
+        smallest &= values == values.min(axis=1, keepdims=True)
+        if smallest.sum(axis=1).max() == 1:
+            break
+
+    chosen = smallest.argmax(axis=1)
+    return (
+        transformed[chosen, np.arange(len(boards))],
+        np.asarray(candidates)[chosen],
+    )
+
+
+def transform_fleet(
+    ships: List[Set[Tuple[int, int]]], t: int, shape: Tuple[int, int]
+) -> List[Set[Tuple[int, int]]]:
+    """Applies transform t to all cells of a fleet."""
+    return [
+        {(int(y), int(x)) for y, x in transform_cells(np.array(sorted(ship)), t, shape)}
+        for ship in ships
+    ]
+
+
+def canonical_fleet(
+    ships: List[Set[Tuple[int, int]]], shape: Tuple[int, int]
+) -> Tuple[List[Set[Tuple[int, int]]], int]:
+    """Maps a fleet to the canonical representative of its symmetry class.
+
+    Args:
+        ships (List[Set[Tuple[int, int]]]): Fleet to canonicalise.
+        shape (Tuple[int, int]): Shape of the board.
+
+    Returns:
+        Tuple of the canonical fleet, with ships sorted by their first cell, and the
+            transform mapping the fleet onto it.
+    """
+    board = np.zeros(shape, dtype=np.int8)
+    for ship in ships:
+        for cell in ship:
+            board[cell] = 1
+
+    # ships never touch, so the occupied cells determine the fleet
+    _, t = canonical_board(board)
+    return sorted(transform_fleet(ships, t, shape), key=min), t
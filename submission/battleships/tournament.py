@@ -0,0 +1,518 @@
+import json
+import math
+import os
+import pickle
+import random
+import time
+from itertools import combinations
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from battleships.engine import BaseAgent, Game, ShotOutcome
+from battleships.stats import TournamentStats
+
+AgentFactory = Callable[[], BaseAgent]
+# called with the player, the outcome of its shot and the seconds the move took
+ShotObserver = Callable[[int, ShotOutcome, float], None]
+
+
+class GameResult(NamedTuple):
+    """Outcome of a single game.
+
+    Attributes:
+        winner (int): Index of the winning player (0 or 1).
+        shots (Tuple[int, int]): Number of shots taken by each player.
+        forfeit (bool): Whether the loser was stopped after too many shots rather
+            than losing all ships.
+    """
+
+    winner: int
+    shots: Tuple[int, int]
+    forfeit: bool = False
+
+
+async def play_game(
+    player1: BaseAgent,
+    player2: BaseAgent,
+    observer: Optional[ShotObserver] = None,
+    max_shots: int = 1000,
+) -> GameResult:
+    """Plays a game between two agents until one of them loses all ships.
+
+    A player which does not win within max_shots shots, e.g. because it keeps
+    repeating the same shot, forfeits the game.
+
+    Args:
+        player1 (BaseAgent): First player.
+        player2 (BaseAgent): Second player.
+        observer (Optional[ShotObserver]): Called after every shot.
+        max_shots (int): Number of shots after which a player forfeits.
+
+    Returns:
+        GameResult of the finished game.
+    """
+    game = Game(player1, player2)
+    await game.initialize()
+
+    players = (player1, player2)
+    shots = [0, 0]
+    player = 0
+
+    while True:
+        # only the shot is timed, not the placement of ships
+        start = time.perf_counter()
+        shot, outcome, _, _ = await game.play_shot(player)
+        if observer is not None:
+            observer(player, outcome, time.perf_counter() - start)
+
+        await players[player].handle_outcome(shot, outcome)
+        shots[player] += 1
+
+        if game.has_won(player):
+            return GameResult(player, (shots[0], shots[1]))
+
+        if shots[player] >= max_shots:
+            return GameResult(player ^ 1, (shots[0], shots[1]), True)
+
+        player ^= 1
+
+
+def seed_game(seed: int) -> None:
+    """Seeds the random number generators used by the engine and agents.
+
+    Seeding before creating the agents makes the whole game reproducible, as long as
+    the agents only draw from random and np.random.
+    """
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+
+
+class CheckpointLog:
+    """Append-only log of finished games, one JSON record per line.
+
+    Every record holds the game number, its seed, the names of the players in the
+    order they played, the index of the winner, the number of shots of each player
+    and whether the loser forfeited. Records are flushed as soon as they are
+    written, so that a crashed run only loses the game in progress.
+
+    Statistics of the logged games are checkpointed next to the log, together with
+    the number of games they cover.
+
+    Attributes:
+        path (str): Path of the log file.
+        stats_path (str): Path of the statistics checkpoint.
+    """
+
+    path: str
+    stats_path: str
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.stats_path = path + ".stats"
+
+    def _read(self) -> Tuple[List[Dict[str, Any]], int]:
+        """Returns the complete records and the number of bytes they take up."""
+        if not os.path.exists(self.path):
+            return [], 0
+
+        records = []
+        size = 0
+        with open(self.path, "rb") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+
+                size += len(line)
+
+        return records, size
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Returns all records in the log, without modifying it.
+
+        A last record which is still being written, or was cut short by a crash, is
+        skipped, so the log can be read while a run is appending to it.
+        """
+        return self._read()[0]
+
+    def repair(self) -> List[Dict[str, Any]]:
+        """Removes anything after the last complete record and returns all records.
+
+        Makes new records follow the complete ones after a crash. Must not be called
+        while games are being appended.
+        """
+        records, size = self._read()
+        if os.path.exists(self.path):
+            with open(self.path, "rb+") as file:
+                file.truncate(size)
+
+        return records
+
+    def append(self, record: Dict[str, Any]) -> None:
+        with open(self.path, "a") as file:
+            file.write(json.dumps(record) + "\n")
+
+    def truncate(self, count: int) -> None:
+        """Removes all but the first count records from the log."""
+        with open(self.path, "rb+") as file:
+            file.truncate(sum(len(line) for _, line in zip(range(count), file)))
+
+    def save_stats(self, stats: TournamentStats, games: int) -> None:
+        """Replaces the statistics checkpoint.
+
+        Args:
+            stats (TournamentStats): Statistics of the logged games.
+            games (int): Number of games the statistics cover.
+        """
+        # written to a temporary file first, so that a crash keeps the old checkpoint
+        temporary = self.stats_path + ".tmp"
+        with open(temporary, "wb") as file:
+            pickle.dump((games, stats), file)
+        os.replace(temporary, self.stats_path)
+
+    def load_stats(self) -> Optional[Tuple[int, TournamentStats]]:
+        """Returns the number of covered games and the statistics, None if there are none."""
+        if not os.path.exists(self.stats_path):
+            return None
+
+        with open(self.stats_path, "rb") as file:
+            return pickle.load(file)
+
+
+def expected_score(rating_difference: float) -> float:
+    """Expected score of a player rated rating_difference points above the opponent."""
+    return 1 / (1 + 10 ** (-rating_difference / 400))
+
+
+class EloRatings:
+    """Incrementally updated Elo ratings.
+
+    Attributes:
+        ratings (Dict[str, float]): Current rating of every agent.
+        k (float): Maximum rating change after a single game.
+    """
+
+    ratings: Dict[str, float]
+    k: float
+
+    def __init__(self, names: List[str], k: float = 16, initial: float = 1500) -> None:
+        self.ratings = {name: initial for name in names}
+        self.k = k
+
+    def expected(self, first: str, second: str) -> float:
+        """Returns expected score of the first agent against the second."""
+        return expected_score(self.ratings[first] - self.ratings[second])
+
+    def update(self, first: str, second: str, score: float) -> None:
+        """Updates ratings after a game.
+
+        Args:
+            first (str): Name of the first agent.
+            second (str): Name of the second agent.
+            score (float): Score of the first agent (1 for a win, 0 for a loss).
+        """
+        delta = self.k * (score - self.expected(first, second))
+        self.ratings[first] += delta
+        self.ratings[second] -= delta
+
+
+class SPRT:
+    """Sequential probability ratio test on the win rate of one agent against another.
+
+    Tests H0: Elo difference is elo0 against H1: Elo difference is elo1, so that a
+    pairing can be stopped as soon as the games played so far are conclusive.
+
+    Attributes:
+        wins (int): Number of games won by the first agent.
+        losses (int): Number of games lost by the first agent.
+        lower (float): Log-likelihood ratio below which H0 is accepted.
+        upper (float): Log-likelihood ratio above which H1 is accepted.
+    """
+
+    wins: int
+    losses: int
+    lower: float
+    upper: float
+
+    def __init__(
+        self,
+        elo0: float = -25,
+        elo1: float = 25,
+        alpha: float = 0.05,
+        beta: float = 0.05,
+    ) -> None:
+        self.wins = 0
+        self.losses = 0
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+
+        p0 = expected_score(elo0)
+        p1 = expected_score(elo1)
+        self._win_llr = math.log(p1 / p0)
+        self._loss_llr = math.log((1 - p1) / (1 - p0))
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.losses
+
+    @property
+    def llr(self) -> float:
+        """Log-likelihood ratio of H1 against H0."""
+        return self.wins * self._win_llr + self.losses * self._loss_llr
+
+    @property
+    def margin(self) -> float:
+        """Distance of the log-likelihood ratio from the closer of the two bounds."""
+        return min(self.llr - self.lower, self.upper - self.llr)
+
+    def update(self, won: bool) -> None:
+        if won:
+            self.wins += 1
+        else:
+            self.losses += 1
+
+    def decision(self) -> Optional[bool]:
+        """Returns the result of the test.
+
+        Returns:
+            True if H1 was accepted, False if H0 was accepted,
+                None if more games are needed.
+        """
+        llr = self.llr
+        if llr >= self.upper:
+            return True
+        if llr <= self.lower:
+            return False
+        return None
+
+
+class MatchMaker:
+    """Adaptive match-making between agents.
+
+    Every pairing of agents is tested with SPRT and dropped once the result is
+    significant. The next game is always played by the pairing whose test is the
+    furthest from a decision, so that games go where the result is most uncertain
+    rather than to pairings which are about to be decided.
+
+    Players which do not win within max_shots shots forfeit the game, so that a
+    stuck agent cannot stall the run.
+
+    Game i is seeded with seed + i. With a checkpoint, every finished game is
+    logged, and games already in the log are replayed into the ratings and tests
+    instead of being played again, so an interrupted run can be resumed.
+
+    Statistics are checkpointed after every logged game and restored on resume.
+    If a run crashed after logging its last game but before checkpointing the
+    statistics, that game is removed from the log and played again, so that shot
+    and game statistics always describe the same games. Games logged before
+    statistics were enabled are not added to them.
+
+    Attributes:
+        agents (Dict[str, AgentFactory]): Maps agent names to functions creating fresh agents.
+        ratings (EloRatings): Ratings updated after every game.
+        tests (Dict[Tuple[str, str], SPRT]): Test for every pairing of agents.
+        max_games (int): Maximum number of games played by a single pairing.
+        max_shots (int): Number of shots after which a player forfeits a game.
+        stats (Optional[TournamentStats]): Statistics updated with every shot and game.
+        seed (int): Seed of the first game.
+        games_played (int): Number of games played so far, including logged ones.
+        checkpoint (Optional[CheckpointLog]): Log of finished games.
+    """
+
+    agents: Dict[str, AgentFactory]
+    ratings: EloRatings
+    tests: Dict[Tuple[str, str], SPRT]
+    max_games: int
+    max_shots: int
+    stats: Optional[TournamentStats]
+    seed: int
+    games_played: int
+    checkpoint: Optional[CheckpointLog]
+
+    def __init__(
+        self,
+        agents: Dict[str, AgentFactory],
+        elo0: float = -25,
+        elo1: float = 25,
+        alpha: float = 0.05,
+        beta: float = 0.05,
+        max_games: int = 10000,
+        k: float = 16,
+        stats: Optional[TournamentStats] = None,
+        checkpoint: Optional[str] = None,
+        seed: int = 0,
+        max_shots: int = 1000,
+    ) -> None:
+        self.agents = agents
+        self.ratings = EloRatings(list(agents), k)
+        self.tests = {
+            pairing: SPRT(elo0, elo1, alpha, beta)
+            for pairing in combinations(agents, 2)
+        }
+        self.max_games = max_games
+        self.max_shots = max_shots
+        self.stats = stats
+        self.seed = seed
+        self.games_played = 0
+        self.checkpoint = None
+
+        if checkpoint is not None:
+            self.checkpoint = CheckpointLog(checkpoint)
+            records = self.checkpoint.repair()
+            if stats is not None:
+                records = self._restore_stats(stats, records)
+
+            for record in records:
+                self._replay(record)
+
+    def next_pairing(self) -> Optional[Tuple[str, str]]:
+        """Returns the pairing which should play next or None if all are decided."""
+        undecided = [
+            pairing
+            for pairing, test in self.tests.items()
+            if test.decision() is None and test.games < self.max_games
+        ]
+        if not undecided:
+            return None
+
+        return max(
+            undecided,
+            key=lambda pairing: (
+                self.tests[pairing].margin,
+                -self.tests[pairing].games,
+            ),
+        )
+
+    def record(self, pairing: Tuple[str, str], first_won: bool) -> None:
+        """Records the result of a game played by a pairing.
+
+        Args:
+            pairing (Tuple[str, str]): Names of the agents, as returned by next_pairing().
+            first_won (bool): Whether the first agent of the pairing won.
+        """
+        self.tests[pairing].update(first_won)
+        self.ratings.update(*pairing, float(first_won))
+
+    async def run(self, max_total_games: Optional[int] = None) -> Dict[str, float]:
+        """Plays games until every pairing is decided.
+
+        Args:
+            max_total_games (Optional[int]): Optional limit on the number of games.
+
+        Returns:
+            Final ratings of all agents.
+        """
+        played = 0
+        while max_total_games is None or played < max_total_games:
+            pairing = self.next_pairing()
+            if pairing is None:
+                break
+
+            # alternate who shoots first to cancel out the first-move advantage
+            names = pairing if self.tests[pairing].games % 2 == 0 else pairing[::-1]
+            seed = self.seed + self.games_played
+            result = await self._play(names, seed)
+
+            if self.checkpoint is not None:
+                self.checkpoint.append(
+                    {
+                        "game": self.games_played,
+                        "seed": seed,
+                        "players": list(names),
+                        "winner": result.winner,
+                        "shots": list(result.shots),
+                        "forfeit": result.forfeit,
+                    }
+                )
+
+            self.record(pairing, names[result.winner] == pairing[0])
+            self.games_played += 1
+            played += 1
+
+            if self.checkpoint is not None and self.stats is not None:
+                self.checkpoint.save_stats(self.stats, self.games_played)
+
+        return dict(self.ratings.ratings)
+
+    def _restore_stats(
+        self, stats: TournamentStats, records: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Adds checkpointed statistics to stats and drops the logged game they miss.
+
+        Returns:
+            The records covered by the statistics checkpoint, all of them if there
+                is no checkpoint yet.
+
+        Raises:
+            ValueError: If the statistics checkpoint does not belong to the log, e.g.
+                because games were logged without statistics in the meantime.
+        """
+        saved = self.checkpoint.load_stats()
+        if saved is None:
+            return records
+
+        games, saved_stats = saved
+        if games not in (len(records), len(records) - 1):
+            raise ValueError(
+                f"Statistics in {self.checkpoint.stats_path} cover {games} games, "
+                f"but {len(records)} games are logged. Remove the file to gather "
+                "statistics of new games only."
+            )
+
+        stats.merge(saved_stats)
+        if games < len(records):
+            self.checkpoint.truncate(games)
+        return records[:games]
+
+    def _replay(self, record: Dict[str, Any]) -> None:
+        """Applies the result of a logged game to the ratings and tests."""
+        names = tuple(record["players"])
+        pairing = names if names in self.tests else names[::-1]
+        winner = record["winner"]
+
+        self.record(pairing, names[winner] == pairing[0])
+        self.games_played = max(self.games_played, record["game"] + 1)
+
+    async def reproduce(self, record: Dict[str, Any]) -> GameResult:
+        """Plays a logged game again with the same seed.
+
+        Args:
+            record (Dict[str, Any]): Record of the game from the checkpoint log.
+
+        Returns:
+            GameResult of the replayed game, the same as the logged one for agents
+                which only draw from random and np.random.
+        """
+        seed_game(record["seed"])
+        players = [self.agents[name]() for name in record["players"]]
+        return await play_game(*players, max_shots=self.max_shots)
+
+    async def _play(self, names: Tuple[str, str], seed: int) -> GameResult:
+        """Plays a seeded game between fresh agents, updating stats if there are any."""
+        seed_game(seed)
+        players = (self.agents[names[0]](), self.agents[names[1]]())
+        if self.stats is None:
+            return await play_game(*players, max_shots=self.max_shots)
+
+        stats = self.stats
+        result = await play_game(
+            *players,
+            lambda player, outcome, latency: stats.record_shot(
+                names[player], outcome, latency, names[player ^ 1]
+            ),
+            self.max_shots,
+        )
+        stats.record_game(
+            names[result.winner],
+            names[result.winner ^ 1],
+            None if result.forfeit else result.shots[result.winner],
+        )
+        return result
+
+    def decisions(self) -> Dict[Tuple[str, str], Optional[bool]]:
+        """Returns, for every pairing, whether its first agent is stronger (None if undecided)."""
+        return {pairing: test.decision() for pairing, test in self.tests.items()}
@@ -0,0 +1,15 @@
+from typing import List, Set, Tuple
+
+import numpy as np
+from battleships.engine import SETTINGS, BaseAgent
+from battleships.random_ship_generator import generate_ships
+
+
+class RandomAgent(BaseAgent):
+    """Places random ships and shoots at random legal cells."""
+
+    async def get_ships(self) -> List[Set[Tuple[int, int]]]:
+        return generate_ships(SETTINGS["ALLOWED_SHIPS"], SETTINGS["BOARD_DIMS"])
+
+    async def shoot(self, board: np.ndarray) -> Tuple[int, int]:
+        return self.legal_shots.sample()
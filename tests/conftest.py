@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the engine is imported as `battleships`, like in submitted agents
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "submission")
+)
@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+from battleships.cache import RECORD_SIZE, PolicyCache
+from battleships.engine import CellState
+
+
+def _board(index: int) -> np.ndarray:
+    board = np.zeros((10, 10), dtype=np.int8)
+    board.flat[index] = CellState.MISS
+    return board
+
+
+def test_entries_reach_the_file_without_close(tmp_path):
+    path = str(tmp_path / "policy.cache")
+    cache = PolicyCache(path=path)
+    cache.put(_board(0), (3, 4))
+
+    assert PolicyCache(path=path).get(_board(0)) == (3, 4)
+
+
+def test_shots_outside_of_the_board_are_not_cached(tmp_path):
+    path = str(tmp_path / "policy.cache")
+    cache = PolicyCache(path=path)
+    cache.put(_board(0), (-1, 4))
+    cache.put(_board(1), (10, 300))
+
+    assert len(cache) == 0
+    assert os.path.getsize(path) == 0
+
+
+def test_file_is_compacted(tmp_path):
+    path = str(tmp_path / "policy.cache")
+    cache = PolicyCache(maxsize=5, path=path)
+    for index in range(100):
+        cache.put(_board(index), (index // 10, index % 10))
+
+    assert os.path.getsize(path) < 2 * 5 * RECORD_SIZE
+
+    reloaded = PolicyCache(maxsize=5, path=path)
+    assert len(reloaded) == 5
+    assert reloaded.get(_board(99)) == (9, 9)
+    assert reloaded.get(_board(0)) is None
@@ -0,0 +1,129 @@
+import asyncio
+import random
+
+import numpy as np
+from agents import RandomAgent
+from battleships.engine import (
+    SETTINGS,
+    Board,
+    CellState,
+    Game,
+    LegalShots,
+    Ship,
+    ShotOutcome,
+)
+from battleships.random_ship_generator import generate_ships
+from battleships.tournament import play_game, seed_game
+
+
+def _board() -> Board:
+    board = Board(SETTINGS["BOARD_DIMS"])
+    board.register_ships(
+        [
+            Ship(ship)
+            for ship in generate_ships(
+                SETTINGS["ALLOWED_SHIPS"], SETTINGS["BOARD_DIMS"]
+            )
+        ]
+    )
+    return board
+
+
+def _state(board: Board):
+    ships = {id(ship): ship for ship in board.ships_cells.values()}
+    return (
+        board.board.copy(),
+        sorted(board.legal_shots),
+        sorted((ship._shots_taken, ship.state) for ship in ships.values()),
+    )
+
+
+def _equal(first, second) -> bool:
+    return (
+        np.array_equal(first[0], second[0])
+        and first[1] == second[1]
+        and first[2] == second[2]
+    )
+
+
+def test_restore_reverts_shots():
+    random.seed(0)
+    height, width = SETTINGS["BOARD_DIMS"]
+
+    for _ in range(20):
+        board = _board()
+        for _ in range(random.randrange(60)):
+            board.shoot((random.randrange(height), random.randrange(width)))
+
+        snapshot = board.snapshot()
+        state = _state(board)
+        for _ in range(random.randrange(1, 60)):
+            # some of the shots are repeated or outside of the board
+            board.shoot((random.randrange(-1, height + 1), random.randrange(width)))
+        board.restore(snapshot)
+
+        assert _equal(_state(board), state)
+
+
+def test_undo_reverts_destroying_a_ship():
+    board = Board((3, 3))
+    board.register_ships([Ship({(0, 0), (0, 1)})])
+    board.shoot((0, 0))
+    state = _state(board)
+
+    assert board.shoot((0, 1))[0] == ShotOutcome.DESTROYED
+    assert board.undo()
+
+    assert _equal(_state(board), state)
+    assert board.board[0, 0] == CellState.HIT
+    assert board.board[0, 1] == CellState.HEALTHY
+
+
+def test_repeated_shots_are_detected_by_legal_shots():
+    board = Board((3, 3))
+    board.register_ships([Ship({(0, 0), (0, 1)})])
+
+    for cell in [(2, 2), (0, 0)]:
+        assert board.shoot(cell)[0] != ShotOutcome.REPEATED_SHOT
+        assert board.shoot(cell) == (ShotOutcome.REPEATED_SHOT, None, [])
+        assert cell not in board.legal_shots
+
+    # an undone shot can be made again
+    board.undo()
+    assert (0, 0) in board.legal_shots
+    assert board.shoot((0, 0))[0] == ShotOutcome.HIT
+
+
+def test_legal_shots():
+    random.seed(0)
+    legal_shots = LegalShots((4, 5))
+    assert len(legal_shots) == 20
+
+    assert legal_shots.remove((1, 2))
+    assert not legal_shots.remove((1, 2))
+    assert not legal_shots.remove((4, 0))
+    assert (1, 2) not in legal_shots
+    assert len(legal_shots) == 19
+    assert all(legal_shots.sample() != (1, 2) for _ in range(200))
+
+    assert legal_shots.add((1, 2))
+    assert not legal_shots.add((1, 2))
+    assert sorted(legal_shots) == [(y, x) for y in range(4) for x in range(5)]
+
+
+def test_agent_can_play_both_sides():
+    seed_game(0)
+    agent = RandomAgent()
+
+    result = asyncio.run(play_game(agent, agent))
+
+    assert max(result.shots) <= np.prod(SETTINGS["BOARD_DIMS"])
+
+
+def test_agents_cannot_change_legal_shots_of_the_game():
+    game = Game(RandomAgent(), RandomAgent())
+    asyncio.run(game.initialize())
+
+    game.player1.legal_shots.remove((0, 0))
+
+    assert (0, 0) in game.board2.legal_shots
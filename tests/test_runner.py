@@ -0,0 +1,58 @@
+import asyncio
+import io
+from typing import List, Set, Tuple
+
+import numpy as np
+import pytest
+from battleships import GameRunner
+from battleships.engine import BaseAgent, CellState, ShotOutcome
+
+
+class RecordingAgent(BaseAgent):
+    """Records what it knows about the board when handling outcomes."""
+
+    def __init__(self) -> None:
+        self.seen = []
+
+    async def get_ships(self) -> List[Set[Tuple[int, int]]]:
+        return []
+
+    async def shoot(self, board: np.ndarray) -> Tuple[int, int]:
+        return self.legal_shots.sample()
+
+    async def handle_outcome(self, shot: Tuple[int, int], outcome: ShotOutcome) -> None:
+        self.seen.append(
+            (
+                shot in self.legal_shots,
+                int(self.inferred_empty.sum()),
+                dict(self.remaining_ships),
+            )
+        )
+
+
+def test_state_is_updated_before_handle_outcome(monkeypatch):
+    messages = [
+        "INIT 10 10",
+        f"U 0 0 {ShotOutcome.HIT} {CellState.HIT} 0,0",
+        f"U 0 1 {ShotOutcome.DESTROYED} {CellState.DESTROYED} 0,0 0,1",
+        f"U 5 5 {ShotOutcome.MISS} {CellState.MISS} 5,5",
+        f"U 5 5 {ShotOutcome.REPEATED_SHOT}",
+    ]
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(messages) + "\n"))
+    agent = RecordingAgent()
+    runner = GameRunner(agent)
+
+    with pytest.raises(EOFError):
+        asyncio.run(runner.run())
+
+    fleet = {1: 4, 2: 3, 3: 2, 4: 1}
+    destroyed = {**fleet, 2: 2}
+    assert agent.seen == [
+        (False, 0, fleet),
+        # the cells around the destroyed ship are known to be empty
+        (False, 4, destroyed),
+        (False, 4, destroyed),
+        (False, 4, destroyed),
+    ]
+    assert runner.board[0, 1] == CellState.DESTROYED
+    assert len(runner.legal_shots) == 97
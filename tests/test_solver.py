@@ -0,0 +1,53 @@
+import random
+import time
+
+import numpy as np
+import pytest
+from battleships.engine import CellState
+from battleships.solver import FleetSolver
+
+
+def _sample(board: np.ndarray, fleet: dict, samples: int) -> np.ndarray:
+    # without any time for exact counting, the solver falls back to sampling
+    solver = FleetSolver(time_budget=60, samples=samples, exact_share=0)
+    result = solver.solve(board, fleet)
+    assert not result.exact
+    return result.probabilities
+
+
+def test_sampled_ships_do_not_touch():
+    random.seed(0)
+    board = np.zeros((3, 3))
+
+    probabilities = _sample(board, {1: 2}, 2000)
+
+    # two single-cell ships never fit next to the centre cell
+    assert probabilities[1, 1] == 0
+    assert np.allclose(
+        probabilities, FleetSolver().solve(board, {1: 2}).probabilities, atol=0.05
+    )
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_sampling_matches_exact_probabilities(seed):
+    random.seed(seed)
+    board = np.zeros((5, 5))
+    board[1, 1] = CellState.HIT
+    board[3, 4] = CellState.MISS
+    fleet = {1: 1, 2: 1, 3: 1}
+
+    exact = FleetSolver().solve(board, fleet)
+    assert exact.exact
+
+    assert np.abs(_sample(board, fleet, 20000) - exact.probabilities).max() < 0.03
+
+
+def test_sampling_keeps_to_time_budget():
+    start = time.monotonic()
+    result = FleetSolver(time_budget=0.2).solve(np.zeros((10, 10)))
+    elapsed = time.monotonic() - start
+
+    assert not result.exact
+    assert elapsed < 0.4
+    # every sampled fleet covers the same number of cells
+    assert np.isclose(result.probabilities.sum(), 20)
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from battleships.symmetry import (
+    canonical_board,
+    canonical_boards,
+    transform_board,
+    transforms,
+)
+
+
+@pytest.mark.parametrize("shape", [(10, 10), (4, 6)])
+def test_canonical_boards_match_canonical_board(shape):
+    rng = np.random.default_rng(0)
+    boards = rng.integers(0, 3, (200, *shape)).astype(np.int8)
+    # symmetric boards, where several transforms give the canonical board
+    boards[:20] = 0
+    boards[20:40] = boards[20:40] + boards[20:40, :, ::-1]
+
+    canonical, chosen = canonical_boards(boards)
+
+    for board, expected, t in zip(boards, canonical, chosen):
+        single, single_t = canonical_board(board)
+        assert np.array_equal(expected, single)
+        assert t == single_t
+
+
+def test_equivalent_boards_share_canonical_board():
+    board = np.random.default_rng(1).integers(0, 3, (10, 10))
+    boards = np.stack([transform_board(board, t) for t in transforms(board.shape)])
+
+    canonical, chosen = canonical_boards(boards)
+
+    assert (canonical == canonical[0]).all()
+    for original, t, result in zip(boards, chosen, canonical):
+        assert np.array_equal(transform_board(original, t), result)
+
+
+def test_canonical_board_rejects_stacks():
+    with pytest.raises(ValueError):
+        canonical_board(np.zeros((3, 10, 10)))
@@ -0,0 +1,107 @@
+import asyncio
+from typing import Optional, Tuple
+
+import numpy as np
+import pytest
+from agents import RandomAgent
+from battleships.engine import SETTINGS, ShotOutcome
+from battleships.stats import TournamentStats
+from battleships.tournament import (
+    CheckpointLog,
+    GameResult,
+    MatchMaker,
+    play_game,
+    seed_game,
+)
+
+
+class ForgetfulAgent(RandomAgent):
+    """Clears its remaining fleet after destroying the first ship."""
+
+    async def handle_outcome(self, shot: Tuple[int, int], outcome: ShotOutcome) -> None:
+        if outcome == ShotOutcome.DESTROYED:
+            for size in self.remaining_ships:
+                self.remaining_ships[size] = 0
+
+
+def test_agents_cannot_change_the_winner():
+    seed_game(0)
+    result = asyncio.run(play_game(ForgetfulAgent(), RandomAgent()))
+
+    # random shots need most of the board to destroy all ships
+    cells = sum(size * count for size, count in SETTINGS["ALLOWED_SHIPS"].items())
+    assert result.shots[result.winner] >= cells
+
+
+class StuckAgent(RandomAgent):
+    """Keeps repeating the same shot."""
+
+    async def shoot(self, board: np.ndarray) -> Tuple[int, int]:
+        return 0, 0
+
+
+def test_stuck_agent_forfeits():
+    seed_game(0)
+    result = asyncio.run(play_game(StuckAgent(), RandomAgent(), max_shots=50))
+
+    assert result == GameResult(1, (50, 49), True)
+
+
+def _match_maker(path: str, stats: Optional[TournamentStats] = None) -> MatchMaker:
+    return MatchMaker(
+        {"a": RandomAgent, "b": RandomAgent}, checkpoint=path, stats=stats, seed=1
+    )
+
+
+def test_resume_matches_uninterrupted_run(tmp_path):
+    full = _match_maker(str(tmp_path / "full.log"))
+    asyncio.run(full.run(10))
+
+    path = str(tmp_path / "games.log")
+    asyncio.run(_match_maker(path).run(6))
+    # a record cut short by a crash
+    with open(path, "a") as file:
+        file.write('{"game": 6')
+
+    assert len(CheckpointLog(path).records()) == 6
+    resumed = _match_maker(path)
+    assert resumed.games_played == 6
+    asyncio.run(resumed.run(4))
+
+    assert resumed.ratings.ratings == full.ratings.ratings
+    assert (
+        CheckpointLog(path).records() == CheckpointLog(full.checkpoint.path).records()
+    )
+
+
+def test_records_do_not_modify_the_log(tmp_path):
+    path = tmp_path / "games.log"
+    path.write_text('{"game": 0}\n{"game"')
+
+    assert CheckpointLog(str(path)).records() == [{"game": 0}]
+    assert path.read_text() == '{"game": 0}\n{"game"'
+
+
+def test_game_missing_from_stats_is_played_again(tmp_path):
+    path = str(tmp_path / "games.log")
+    asyncio.run(_match_maker(path, TournamentStats()).run(3))
+    # a crash after logging the fourth game but before checkpointing statistics
+    games, stats = CheckpointLog(path).load_stats()
+    asyncio.run(_match_maker(path, TournamentStats()).run(1))
+    CheckpointLog(path).save_stats(stats, games)
+
+    resumed = _match_maker(path, TournamentStats())
+
+    assert resumed.games_played == 3
+    assert len(CheckpointLog(path).records()) == 3
+    assert sum(agent.games for agent in resumed.stats.agents.values()) == 2 * 3
+
+
+def test_stale_stats_keep_the_log(tmp_path):
+    path = str(tmp_path / "games.log")
+    asyncio.run(_match_maker(path, TournamentStats()).run(3))
+    asyncio.run(_match_maker(path).run(3))
+
+    with pytest.raises(ValueError):
+        _match_maker(path, TournamentStats())
+    assert len(CheckpointLog(path).records()) == 6
@@ -0,0 +1,47 @@
+import asyncio
+import random
+
+import numpy as np
+import pytest
+from agents import RandomAgent
+from battleships.engine import SETTINGS
+from battleships.vec_env import SelfPlayGame, VecSelfPlayEnv
+
+
+def test_observation_is_the_masked_board():
+    random.seed(0)
+    game = SelfPlayGame(RandomAgent)
+    observation = np.zeros(SETTINGS["BOARD_DIMS"], dtype=np.int8)
+
+    async def play() -> None:
+        await game.reset(observation)
+        for _ in range(300):
+            shot = (random.randrange(-1, 11), random.randrange(10))
+            _, _, done = await game.step(shot, observation)
+            if done:
+                await game.reset(observation)
+            assert np.array_equal(observation, game._game.board2.get_masked_board())
+
+    asyncio.run(play())
+
+
+class BrokenAgent(RandomAgent):
+    async def get_ships(self):
+        raise ValueError("No ships.")
+
+
+def test_errors_are_raised_in_the_parent():
+    env = VecSelfPlayEnv(RandomAgent, num_envs=2, num_workers=1)
+    try:
+        with pytest.raises(RuntimeError):
+            env.step(np.zeros((2, 2), dtype=int))
+    finally:
+        env.close()
+
+    env = VecSelfPlayEnv(BrokenAgent, num_envs=2, num_workers=1)
+    try:
+        with pytest.raises(RuntimeError) as error:
+            env.reset()
+        assert isinstance(error.value.__cause__, ValueError)
+    finally:
+        env.close()